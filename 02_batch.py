@@ -1,96 +1,308 @@
 import argparse
 import os
+import sys
 import timeit
+from array import array
 
-import numpy as np
+# A power-of-two tape lets the pointer wrap with a mask instead of a modulo
+TAPE_SIZE = 1 << 15
+MASK = TAPE_SIZE - 1
 
+# Whether to end with a newline so zsh does not mark the output with '%'
+ZSH_FIXUP = "zsh" in os.environ.get("SHELL", "")
 
-def parse_code(raw: str) -> list[tuple[str, int]]:
-    # Create an ir and collapse repeated operations
+# Bytes of program output held back before they are written out
+OUTPUT_BUFFER_SIZE = 1 << 12
+# Single-byte output for every cell value, built once rather than per '.'
+BYTES: list[bytes] = [bytes([i]) for i in range(256)]
+
+# Opcode of each command, which is also the index of its handler in run()
+COMMANDS = "><+-,.[]ZCAS"
+OPCODES: dict[str, int] = {cmd: i for i, cmd in enumerate(COMMANDS)}
+OPEN, CLOSE = OPCODES["["], OPCODES["]"]
+
+# Every byte other than the eight commands, deleted in one bytes.translate pass
+NON_COMMANDS = bytes(b for b in range(256) if b not in b"+-<>.,[]")
+# Commands that share a run with their opposite when collapsing repeats
+RUN_KINDS: dict[str, str] = {"-": "+", "<": ">"}
+
+
+def parse_code(raw: str) -> tuple[array, array, array]:
+    """Parse source into parallel arrays of opcodes, counts and offsets"""
+    # Create an ir of (cmd, count, offset) and collapse repeated operations.
+    # Mixed runs of +- or <> fold into their net change, so "+-+" is one '+',
+    # and runs left next to each other once a run nets to zero fold together,
+    # so "+><+" is one '+' as well.
     ops = []
-    last = None # last character
-    count = 0 # count of consecutive characters
-
-    for c in raw:
-        if c not in "+-<>.,[]":
-            continue
-        
-        if c == last:
-            count += 1
+    last = None # kind of the current run, '+' for +- and '>' for <>
+    count = 0 # net change of a +- or <> run, or the length of any other run
+
+    def emit(kind, count):
+        if kind is None:
+            return
+        if kind not in "+>":
+            ops.append((kind, count, 0))
+            return
+        if ops and RUN_KINDS.get(ops[-1][0], ops[-1][0]) == kind:
+            prev, prev_count, _ = ops.pop()
+            count += prev_count if prev == kind else -prev_count
+        if count > 0:
+            ops.append((kind, count, 0))
+        elif count < 0:
+            ops.append(("-" if kind == "+" else "<", -count, 0))
+
+    for c in raw.encode("ascii", "ignore").translate(None, NON_COMMANDS).decode("ascii"):
+        kind = RUN_KINDS.get(c, c)
+        step = -1 if c in "-<" else 1
+        # Brackets are never collapsed, each one opens or closes its own loop
+        if kind == last and kind not in "[]":
+            count += step
         else:
-            if last is not None:
-                ops.append((last, count))
-            last = c
-            count = 1
+            emit(last, count)
+            last = kind
+            count = step
+
+    emit(last, count)
+
+    ops = fuse_offsets(fuse_loops(ops))
+    return (
+        array('b', [OPCODES[cmd] for cmd, _, _ in ops]),
+        array('i', [count for _, count, _ in ops]),
+        array('i', [offset for _, _, offset in ops]),
+    )
+
+
+def loop_deltas(ops: list[tuple[str, int, int]], start: int) -> tuple[int, dict[int, int]] | None:
+    """Net change to each cell, keyed by offset, made by one pass through the
+    loop opening at *start*. Only loops made of ``+-<>`` that return the
+    pointer to where it started qualify, otherwise None."""
+    deltas = {}
+    offset = 0
+
+    for end in range(start + 1, len(ops)):
+        c, count, _ = ops[end]
+        match c:
+            case '>':
+                offset += count
+            case '<':
+                offset -= count
+            case '+':
+                deltas[offset] = deltas.get(offset, 0) + count
+            case '-':
+                deltas[offset] = deltas.get(offset, 0) - count
+            case ']':
+                if offset != 0:
+                    return None
+                return end, {k: v for k, v in deltas.items() if v != 0}
+            case _:
+                return None
+
+    return None
+
+
+def fuse_loops(ops: list[tuple[str, int, int]]) -> list[tuple[str, int, int]]:
+    """Replace clear loops with 'Z' (zero the cell) and copy loops with a 'C'
+    (add the cell to the one at *offset*) per target followed by 'Z'"""
+    fused = []
+    i = 0
+
+    while i < len(ops):
+        loop = loop_deltas(ops, i) if ops[i][0] == "[" else None
+        if loop is not None:
+            end, deltas = loop
+            origin = deltas.pop(0, 0)
+            if origin in (-1, 1) and not deltas:
+                # [-] or [+]
+                fused.append(('Z', 1, 0))
+                i = end + 1
+                continue
+            if origin == -1 and all(v == 1 for v in deltas.values()):
+                # [->+<], [->+>+<<], ...
+                fused.extend(('C', 1, offset) for offset in deltas)
+                fused.append(('Z', 1, 0))
+                i = end + 1
+                continue
+        fused.append(ops[i])
+        i += 1
+
+    return fused
+
+
+def offset_body(body: list[tuple[str, int, int]]) -> list[tuple[str, int, int]] | None:
+    """Rewrite a loop body made of ``+-<>Z`` that returns the pointer to where
+    it started as one update per cell, using 'A' (add *count* at *offset*)
+    and 'S' (set to *count* at *offset*) for cells away from the pointer.
+    Returns None for any other body."""
+    cells = {} # offset -> (kind, value), kind is '+' to add or 'Z' to set
+    offset = 0
+
+    for c, count, _ in body:
+        match c:
+            case '>':
+                offset += count
+            case '<':
+                offset -= count
+            case '+' | '-':
+                kind, value = cells.get(offset, ('+', 0))
+                cells[offset] = (kind, value + count if c == '+' else value - count)
+            case 'Z':
+                cells[offset] = ('Z', 0)
+            case _:
+                return None
 
-    if last is not None:
-        ops.append((last, count))
+    if offset != 0:
+        return None
 
-    return ops
+    # Updates to different cells are independent, so their order is free
+    fused = []
+    for offset, (kind, value) in cells.items():
+        if offset == 0:
+            if kind == 'Z':
+                fused.append(('Z', 1, 0))
+            if value > 0:
+                fused.append(('+', value, 0))
+            elif value < 0:
+                fused.append(('-', -value, 0))
+        elif kind == 'Z':
+            fused.append(('S', value & 0xFF, offset))
+        elif value & 0xFF:
+            fused.append(('A', value & 0xFF, offset))
 
+    return fused
 
-def build_jump_table(code: list[tuple[str, int]]) -> dict[int, int]:
+
+def fuse_offsets(ops: list[tuple[str, int, int]]) -> list[tuple[str, int, int]]:
+    """Apply ``offset_body`` to the body of every innermost loop"""
+    fused = []
+    start = None # position in fused of the innermost open '['
+
+    for op in ops:
+        fused.append(op)
+        if op[0] == "[":
+            start = len(fused) - 1
+        elif op[0] == "]" and start is not None:
+            body = offset_body(fused[start + 1:-1])
+            if body is not None:
+                fused[start + 1:-1] = body
+            start = None
+
+    return fused
+
+
+def build_jump_table(opcodes: array) -> array:
     """Build a jump table by parsing brackets using a stack"""
-    table = {}
-    stack = []
-
-    for i, (c, _) in enumerate(code):
-        if c == "[":
-            stack.append(i)
-        elif c == "]":
-            if not stack:
+    table = array('i', [-1]) * len(opcodes)
+    # Nesting is never deeper than the number of [, so the stack is allocated once
+    stack = array('i', [0]) * opcodes.count(OPEN)
+    top = 0
+
+    for i, op in enumerate(opcodes):
+        if op == OPEN:
+            stack[top] = i
+            top += 1
+        elif op == CLOSE:
+            if not top:
                 raise SyntaxError(f"Unmatched ] at position {i}")
-            open_idx = stack.pop()
+            top -= 1
+            open_idx = stack[top]
             table[open_idx] = i
             table[i] = open_idx
 
-    if stack:
-        raise SyntaxError(f"Unmatched [ at position {stack.pop()}")
+    if top:
+        raise SyntaxError(f"Unmatched [ at position {stack[top - 1]}")
 
     return table
 
 
-def run(ops: str, /, *, debug: bool = False) -> None:
-    """Interpret a Brainf*** program in *file*."""
-    tape: np.ndarray = np.zeros(30_000, dtype=np.uint8)
+def run(program: tuple[array, array, array], jumps: array, /, *, debug: bool = False) -> None:
+    """Interpret a Brainf*** program in *file*, given its ``build_jump_table``."""
+    opcodes, counts, offsets = program
+    tape: bytearray = bytearray(TAPE_SIZE)
     ptr: int = 0
-    jump_table: dict[int, int] = build_jump_table(ops)
+    outbuf: bytearray = bytearray()
+
+    def flush_output():
+        sys.stdout.flush() # anything already print()ed comes first
+        sys.stdout.buffer.write(outbuf)
+        sys.stdout.buffer.flush()
+        outbuf.clear()
+
+    # One handler per command, each returning the next ip
+    def right(ip, count, offset):
+        nonlocal ptr
+        ptr = (ptr + count) & MASK
+        return ip + 1
+
+    def left(ip, count, offset):
+        nonlocal ptr
+        ptr = (ptr - count) & MASK
+        return ip + 1
+
+    def inc(ip, count, offset):
+        tape[ptr] = (tape[ptr] + count) & 0xFF
+        return ip + 1
+
+    def dec(ip, count, offset):
+        tape[ptr] = (tape[ptr] - count) & 0xFF
+        return ip + 1
+
+    def read(ip, count, offset):
+        flush_output()
+        tape[ptr] = ord(input()[0]) & 0xFF # Only take first char
+        return ip + 1
+
+    def write(ip, count, offset):
+        outbuf.extend(BYTES[tape[ptr]] * count)
+        if len(outbuf) >= OUTPUT_BUFFER_SIZE:
+            flush_output()
+        return ip + 1
+
+    def open_loop(ip, count, offset):
+        if tape[ptr] == 0:
+            return jumps[ip] # skip execution
+        return ip + 1
+
+    def close_loop(ip, count, offset):
+        if tape[ptr] != 0:
+            return jumps[ip] # return to start of loop
+        return ip + 1
+
+    def zero(ip, count, offset):
+        tape[ptr] = 0
+        return ip + 1
+
+    def copy(ip, count, offset):
+        i = (ptr + offset) & MASK
+        tape[i] = (tape[i] + tape[ptr]) & 0xFF
+        return ip + 1
+
+    def add_at(ip, count, offset):
+        i = (ptr + offset) & MASK
+        tape[i] = (tape[i] + count) & 0xFF
+        return ip + 1
+
+    def set_at(ip, count, offset):
+        tape[(ptr + offset) & MASK] = count
+        return ip + 1
+
+    handlers = [
+        right, left, inc, dec, read, write, open_loop, close_loop,
+        zero, copy, add_at, set_at,
+    ]
+    n: int = len(opcodes)
 
     ip: int = 0
-    while ip < len(ops):
-        cmd, count = ops[ip]
+    while ip < n:
+        next_ip = handlers[opcodes[ip]](ip, counts[ip], offsets[ip])
 
-        match cmd:
-            case '>':
-                ptr = (ptr + count) % len(tape)
-            case '<':
-                ptr = (ptr - count) % len(tape)
-            case '+':
-                tape[ptr] += count
-            case '-':
-                tape[ptr] -= count
-            case ',':
-                tape[ptr] = np.uint8(ord(input()[0])) # Only take first char
-            case '.':
-                print(chr(tape[ptr]) *  count, end='', flush=True)
-            case '[':
-                if tape[ptr] == 0:
-                    ip = jump_table[ip] # skip execution
-                    continue
-            case ']':
-                if tape[ptr] != 0:
-                    ip = jump_table[ip] # return to start of loop
-                    continue
-            case _:
-                # Should never get here
-                raise RuntimeError(f"Invalid instruction: {cmd}")
-        
         if debug:
-            print(f"ip={ip}, cmd={cmd}, ptr={ptr}, tape[{ptr}]={tape[ptr]}")
-        ip += 1
-    
+            flush_output()
+            print(f"ip={ip}, cmd={COMMANDS[opcodes[ip]]}, ptr={ptr}, tape[{ptr}]={tape[ptr]}")
+        ip = next_ip
     
-    if "zsh" in os.environ.get("SHELL", ""):
+    flush_output()
+
+    if ZSH_FIXUP:
         # Suppress `%` prompt artifact in zsh
         print()
 
@@ -117,17 +329,19 @@ def main() -> None:
     # Load program
     with open(args.source, "r", encoding="utf-8") as f:
         program = parse_code(f.read())
+    # Matched once up front rather than on every timed run
+    jumps = build_jump_table(program[0])
 
     # Run or benchmark
     if args.time:
         seconds = timeit.timeit(
-            lambda: run(program, debug=args.debug),
+            lambda: run(program, jumps, debug=args.debug),
             number=args.number
         )
         print(f"{seconds:.6f} s for {args.number} runs "
               f"({seconds/args.number:.6f} s per run)")
     else:
-        run(program, debug=args.debug)
+        run(program, jumps, debug=args.debug)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,185 @@
+import argparse
+import os
+import timeit
+from array import array
+
+import numpy as np
+from numba import njit
+
+# A power-of-two tape lets the pointer wrap with a mask instead of a modulo
+TAPE_SIZE = 1 << 15
+MASK = TAPE_SIZE - 1
+
+# Whether to end with a newline so zsh does not mark the output with '%'
+ZSH_FIXUP = "zsh" in os.environ.get("SHELL", "")
+
+# Opcode of each command, in the same order as 02_batch's handlers
+OPCODES: dict[str, int] = {cmd: i for i, cmd in enumerate("><+-,.[]")}
+RIGHT, LEFT, INC, DEC, READ, WRITE, OPEN, CLOSE = range(8)
+
+# Every byte other than the eight commands, deleted in one bytes.translate pass
+NON_COMMANDS = bytes(b for b in range(256) if b not in b"+-<>.,[]")
+
+
+def parse_code(raw: str) -> list[tuple[str, int]]:
+    # Create an ir and collapse repeated operations
+    ops = []
+    last = None # last character
+    count = 0 # count of consecutive characters
+
+    for c in raw.encode("ascii", "ignore").translate(None, NON_COMMANDS).decode("ascii"):
+        # Brackets are never collapsed, each one opens or closes its own loop
+        if c == last and c not in "[]":
+            count += 1
+        else:
+            if last is not None:
+                ops.append((last, count))
+            last = c
+            count = 1
+
+    if last is not None:
+        ops.append((last, count))
+
+    return ops
+
+
+def build_jump_table(code: list[tuple[str, int]]) -> np.ndarray:
+    """Build a jump table by parsing brackets using a stack"""
+    table = np.full(len(code), -1, dtype=np.int32)
+    # Nesting is never deeper than the number of [, and brackets are never
+    # collapsed, so the stack is allocated once
+    stack = array('i', [0]) * code.count(("[", 1))
+    top = 0
+
+    for i, (c, _) in enumerate(code):
+        if c == "[":
+            stack[top] = i
+            top += 1
+        elif c == "]":
+            if not top:
+                raise SyntaxError(f"Unmatched ] at position {i}")
+            top -= 1
+            open_idx = stack[top]
+            table[open_idx] = i
+            table[i] = open_idx
+
+    if top:
+        raise SyntaxError(f"Unmatched [ at position {stack[top - 1]}")
+
+    return table
+
+
+@njit(cache=True)
+def run_nb(opcodes, counts, jumps, tape, ptr, ip, step):
+    """Execute from *ip* until the next I/O instruction or the end of the
+    program (or a single instruction if *step*), returning ``(ptr, ip)``."""
+    while ip < opcodes.size:
+        op = opcodes[ip]
+        count = counts[ip]
+        if op == RIGHT:
+            ptr = (ptr + count) & MASK
+        elif op == LEFT:
+            ptr = (ptr - count) & MASK
+        elif op == INC:
+            tape[ptr] += count
+        elif op == DEC:
+            tape[ptr] -= count
+        elif op == OPEN:
+            if tape[ptr] == 0:
+                ip = jumps[ip] # skip execution
+        elif op == CLOSE:
+            if tape[ptr] != 0:
+                ip = jumps[ip] # return to start of loop
+        else:
+            # I/O is left to the Python side
+            break
+        ip += 1
+        if step:
+            break
+    return ptr, ip
+
+
+def prepare(ops: list[tuple[str, int]]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Lower the IR to the opcode, count and jump arrays ``run_nb`` takes"""
+    opcodes = np.array([OPCODES[cmd] for cmd, _ in ops], dtype=np.int8)
+    counts = np.array([count for _, count in ops], dtype=np.int32)
+    return opcodes, counts, build_jump_table(ops)
+
+
+def run(
+    ops: list[tuple[str, int]],
+    arrays: tuple[np.ndarray, np.ndarray, np.ndarray],
+    /, *, debug: bool = False,
+) -> None:
+    """Interpret a Brainf*** program in *file*, given its ``prepare``d arrays."""
+    opcodes, counts, jumps = arrays
+    tape: np.ndarray = np.zeros(TAPE_SIZE, dtype=np.uint8)
+
+    ptr: int = 0
+    ip: int = 0
+    while ip < len(ops):
+        cmd, count = ops[ip]
+        start = ip
+
+        if cmd == ',':
+            tape[ptr] = ord(input()[0]) & 0xFF # Only take first char
+            ip += 1
+        elif cmd == '.':
+            print(chr(tape[ptr]) * count, end='', flush=True)
+            ip += 1
+        else:
+            ptr, ip = run_nb(opcodes, counts, jumps, tape, ptr, ip, debug)
+
+        if debug:
+            print(f"ip={start}, cmd={cmd}, ptr={ptr}, tape[{ptr}]={tape[ptr]}")
+
+
+    if ZSH_FIXUP:
+        # Suppress `%` prompt artifact in zsh
+        print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Minimal Brainf**k interpreter with optional timing and debug output."
+    )
+    parser.add_argument("source", help="Path to Brainf**k source file")
+    parser.add_argument(
+        "-d", "--debug", action="store_true",
+        help="print interpreter state after every instruction"
+    )
+    parser.add_argument(
+        "-t", "--time", action="store_true",
+        help="time execution with the built-in timeit module"
+    )
+    parser.add_argument(
+        "-n", "--number", type=int, default=1000,
+        help="number of repetitions to run when --time is given (default: 1000)"
+    )
+    args = parser.parse_args()
+
+    # Load program
+    with open(args.source, "r", encoding="utf-8") as f:
+        program = parse_code(f.read())
+    # Lowered once up front rather than on every timed run
+    arrays = prepare(program)
+
+    # Run or benchmark
+    if args.time:
+        seconds = timeit.timeit(
+            lambda: run(program, arrays, debug=args.debug),
+            number=args.number
+        )
+        print(f"{seconds:.6f} s for {args.number} runs "
+              f"({seconds/args.number:.6f} s per run)")
+    else:
+        run(program, arrays, debug=args.debug)
+
+
+if __name__ == "__main__":
+    main()
+
+    """
+    $ uv run 03_numba.py example.bf --time -n 10000
+    0.876973 s for 10000 runs (0.000088 s per run)
+    """
@@ -0,0 +1,249 @@
+import argparse
+import ctypes
+import mmap
+import os
+import platform
+import struct
+import sys
+import timeit
+
+# A power-of-two tape lets the pointer wrap with a mask instead of a modulo
+TAPE_SIZE = 1 << 15
+MASK = TAPE_SIZE - 1
+
+# Whether to end with a newline so zsh does not mark the output with '%'
+ZSH_FIXUP = "zsh" in os.environ.get("SHELL", "")
+
+# Bytes of program output held back before they are written out
+OUTPUT_BUFFER_SIZE = 1 << 12
+# Single-byte output for every cell value, built once rather than per '.'
+BYTES: list[bytes] = [bytes([i]) for i in range(256)]
+
+# Callbacks the generated code uses for I/O: write(cell, count) and read().
+# Both return a negative value to make the program stop early.
+WRITE_FN = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_int, ctypes.c_int)
+READ_FN = ctypes.CFUNCTYPE(ctypes.c_int)
+# The generated code itself: program(tape, write, read)
+PROGRAM_FN = ctypes.CFUNCTYPE(None, ctypes.c_void_p, WRITE_FN, READ_FN)
+
+# x86-64 encodings. The tape base lives in r12, ptr in rbx and the write and
+# read callbacks in r13 and r14; CELL is the [r12 + rbx] memory operand.
+CELL = b"\x04\x1c"
+PROLOGUE = (
+    b"\x53"             # push rbx
+    b"\x41\x54"         # push r12
+    b"\x41\x55"         # push r13
+    b"\x41\x56"         # push r14
+    b"\x41\x57"         # push r15 (keeps the stack 16-byte aligned for calls)
+    b"\x49\x89\xfc"     # mov r12, rdi
+    b"\x49\x89\xf5"     # mov r13, rsi
+    b"\x49\x89\xd6"     # mov r14, rdx
+    b"\x31\xdb"         # xor ebx, ebx
+)
+EPILOGUE = (
+    b"\x41\x5f"         # pop r15
+    b"\x41\x5e"         # pop r14
+    b"\x41\x5d"         # pop r13
+    b"\x41\x5c"         # pop r12
+    b"\x5b"             # pop rbx
+    b"\xc3"             # ret
+)
+ADD_CELL = b"\x41\x80" + CELL                       # add byte [r12+rbx], imm8
+ADD_PTR = b"\x48\x81\xc3"                           # add rbx, imm32
+AND_PTR = b"\x48\x81\xe3"                           # and rbx, imm32
+CMP_CELL_ZERO = b"\x41\x80\x3c\x1c\x00"             # cmp byte [r12+rbx], 0
+JE = b"\x0f\x84"                                    # je rel32
+JNE = b"\x0f\x85"                                   # jne rel32
+LOAD_CELL_EDI = b"\x41\x0f\xb6\x3c\x1c"             # movzx edi, byte [r12+rbx]
+MOV_ESI = b"\xbe"                                   # mov esi, imm32
+CALL_WRITE = b"\x41\xff\xd5"                        # call r13
+CALL_READ = b"\x41\xff\xd6"                         # call r14
+STORE_AL = b"\x41\x88" + CELL                       # mov byte [r12+rbx], al
+TEST_EAX = b"\x85\xc0"                              # test eax, eax
+JS = b"\x0f\x88"                                    # js rel32
+
+# Every byte other than the eight commands, deleted in one bytes.translate pass
+NON_COMMANDS = bytes(b for b in range(256) if b not in b"+-<>.,[]")
+
+
+def parse_code(raw: str) -> list[tuple[str, int]]:
+    # Create an ir and collapse repeated operations
+    ops = []
+    last = None # last character
+    count = 0 # count of consecutive characters
+
+    for c in raw.encode("ascii", "ignore").translate(None, NON_COMMANDS).decode("ascii"):
+        # Brackets are never collapsed, each one opens or closes its own loop
+        if c == last and c not in "[]":
+            count += 1
+        else:
+            if last is not None:
+                ops.append((last, count))
+            last = c
+            count = 1
+
+    if last is not None:
+        ops.append((last, count))
+
+    return ops
+
+
+def assemble(ops: list[tuple[str, int]], /, *, debug: bool = False) -> bytes:
+    """Translate the IR into x86-64 machine code for a ``PROGRAM_FN``"""
+    code = bytearray(PROLOGUE)
+    stack = [] # (ip, end of its je) for every open bracket
+    spans = [] # (ip, start, end) of the code emitted for each instruction
+    exits = [] # end of the js after every callback, patched to the epilogue
+
+    for ip, (cmd, count) in enumerate(ops):
+        start = len(code)
+        match cmd:
+            case '>':
+                code += ADD_PTR + struct.pack("<i", count) + AND_PTR + struct.pack("<i", MASK)
+            case '<':
+                code += ADD_PTR + struct.pack("<i", -count) + AND_PTR + struct.pack("<i", MASK)
+            case '+':
+                code += ADD_CELL + bytes([count & 0xFF])
+            case '-':
+                code += ADD_CELL + bytes([-count & 0xFF])
+            case ',':
+                # One read per run, as in 02_batch
+                code += CALL_READ + TEST_EAX + JS + bytes(4)
+                exits.append(len(code))
+                code += STORE_AL
+            case '.':
+                code += LOAD_CELL_EDI + MOV_ESI + struct.pack("<i", count) + CALL_WRITE
+                code += TEST_EAX + JS + bytes(4)
+                exits.append(len(code))
+            case '[':
+                # Jump target is patched in once the matching ] is seen
+                code += CMP_CELL_ZERO + JE + bytes(4)
+                stack.append((ip, len(code)))
+            case ']':
+                if not stack:
+                    raise SyntaxError(f"Unmatched ] at position {ip}")
+                _, body = stack.pop()
+                code += CMP_CELL_ZERO + JNE
+                code += struct.pack("<i", body - (len(code) + 4))
+                code[body - 4:body] = struct.pack("<i", len(code) - body)
+        spans.append((ip, start, len(code)))
+
+    if stack:
+        raise SyntaxError(f"Unmatched [ at position {stack.pop()[0]}")
+
+    # A failed callback leaves the program straight through the epilogue
+    for end in exits:
+        code[end - 4:end] = struct.pack("<i", len(code) - end)
+
+    if debug:
+        for ip, start, end in spans:
+            cmd, count = ops[ip]
+            print(f"ip={ip}, cmd={cmd}, count={count}, code={code[start:end].hex(' ')}")
+
+    return bytes(code + EPILOGUE)
+
+
+def compile_bf(ops: list[tuple[str, int]], /, *, debug: bool = False) -> PROGRAM_FN:
+    """Assemble the IR into executable memory and return it as a callable"""
+    if sys.platform == "win32" or platform.machine().lower() not in ("x86_64", "amd64"):
+        raise RuntimeError("The JIT only supports x86-64 with the System V calling convention")
+
+    machine_code = assemble(ops, debug=debug)
+    memory = mmap.mmap(
+        -1, len(machine_code),
+        prot=mmap.PROT_READ | mmap.PROT_WRITE | mmap.PROT_EXEC,
+    )
+    memory.write(machine_code)
+    # cast() holds on to code, which in turn keeps the mapping alive
+    code = (ctypes.c_char * len(machine_code)).from_buffer(memory)
+    return ctypes.cast(code, PROGRAM_FN)
+
+
+def run(program: PROGRAM_FN, /) -> None:
+    """Execute a Brainf*** program compiled by ``compile_bf``."""
+    tape = (ctypes.c_uint8 * TAPE_SIZE)()
+    outbuf: bytearray = bytearray()
+    # ctypes only prints exceptions raised in a callback, so they are kept
+    # here and raised once the program has returned
+    error: BaseException | None = None
+
+    def flush_output():
+        sys.stdout.flush() # anything already print()ed comes first
+        sys.stdout.buffer.write(outbuf)
+        sys.stdout.buffer.flush()
+        outbuf.clear()
+
+    @WRITE_FN
+    def write(cell, count):
+        nonlocal error
+        try:
+            outbuf.extend(BYTES[cell] * count)
+            if len(outbuf) >= OUTPUT_BUFFER_SIZE:
+                flush_output()
+        except BaseException as e:
+            error = e
+            return -1
+        return 0
+
+    @READ_FN
+    def read():
+        nonlocal error
+        try:
+            flush_output()
+            return ord(input()[0]) & 0xFF # Only take first char
+        except BaseException as e:
+            error = e
+            return -1
+
+    program(tape, write, read)
+    if error is not None:
+        raise error
+    flush_output()
+
+    if ZSH_FIXUP:
+        # Suppress `%` prompt artifact in zsh
+        print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Minimal Brainf**k x86-64 JIT compiler with optional timing and debug output."
+    )
+    parser.add_argument("source", help="Path to Brainf**k source file")
+    parser.add_argument(
+        "-d", "--debug", action="store_true",
+        help="print the machine code emitted for every instruction"
+    )
+    parser.add_argument(
+        "-t", "--time", action="store_true",
+        help="time execution with the built-in timeit module"
+    )
+    parser.add_argument(
+        "-n", "--number", type=int, default=1000,
+        help="number of repetitions to run when --time is given (default: 1000)"
+    )
+    args = parser.parse_args()
+
+    # Load and compile program
+    with open(args.source, "r", encoding="utf-8") as f:
+        program = compile_bf(parse_code(f.read()), debug=args.debug)
+
+    # Run or benchmark
+    if args.time:
+        seconds = timeit.timeit(
+            lambda: run(program),
+            number=args.number
+        )
+        print(f"{seconds:.6f} s for {args.number} runs "
+              f"({seconds/args.number:.6f} s per run)")
+    else:
+        run(program)
+
+
+if __name__ == "__main__":
+    main()
+
+    """
+    $ uv run 05_jit.py example.bf --time -n 10000
+    0.110807 s for 10000 runs (0.000011 s per run)
+    """
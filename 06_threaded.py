@@ -0,0 +1,196 @@
+import argparse
+import os
+import sys
+import timeit
+from collections.abc import Callable
+
+# A power-of-two tape lets the pointer wrap with a mask instead of a modulo
+TAPE_SIZE = 1 << 15
+MASK = TAPE_SIZE - 1
+
+# Whether to end with a newline so zsh does not mark the output with '%'
+ZSH_FIXUP = "zsh" in os.environ.get("SHELL", "")
+
+# Every byte other than the eight commands, deleted in one bytes.translate pass
+NON_COMMANDS = bytes(b for b in range(256) if b not in b"+-<>.,[]")
+
+# Interpreter state shared by the handlers, a [tape, ptr] list
+TAPE, PTR = range(2)
+Handler = Callable[[int, int, list], int]
+
+
+# Each handler takes its instruction's argument, the ip of the instruction that
+# follows it and the state, and returns the ip to continue from. The argument
+# is the repeat count, or for brackets the ip to continue from when the jump is
+# taken.
+def h_right(count, nxt, state):
+    state[PTR] = (state[PTR] + count) & MASK
+    return nxt
+
+
+def h_left(count, nxt, state):
+    state[PTR] = (state[PTR] - count) & MASK
+    return nxt
+
+
+def h_plus(count, nxt, state):
+    tape, ptr = state
+    tape[ptr] = (tape[ptr] + count) & 0xFF
+    return nxt
+
+
+def h_minus(count, nxt, state):
+    tape, ptr = state
+    tape[ptr] = (tape[ptr] - count) & 0xFF
+    return nxt
+
+
+def h_read(count, nxt, state):
+    tape, ptr = state
+    tape[ptr] = ord(input()[0]) & 0xFF # Only take first char
+    return nxt
+
+
+def h_write(count, nxt, state):
+    tape, ptr = state
+    sys.stdout.write(chr(tape[ptr]) * count)
+    return nxt
+
+
+def h_open(target, nxt, state):
+    tape, ptr = state
+    if tape[ptr] == 0:
+        return target # skip execution
+    return nxt
+
+
+def h_close(target, nxt, state):
+    tape, ptr = state
+    if tape[ptr] != 0:
+        return target # return to start of loop
+    return nxt
+
+
+def h_halt(count, nxt, state):
+    return nxt
+
+
+HANDLERS: dict[str, Handler] = {
+    '>': h_right, '<': h_left, '+': h_plus, '-': h_minus,
+    ',': h_read, '.': h_write, '[': h_open, ']': h_close,
+}
+COMMANDS: dict[Handler, str] = {h: c for c, h in HANDLERS.items()}
+
+
+def parse_code(raw: str) -> list[tuple[Handler, int, int]]:
+    """Parse source into a threaded ir of (handler, argument, next ip) triples"""
+    # Create an ir and collapse repeated operations
+    ops = []
+    last = None # last character
+    count = 0 # count of consecutive characters
+
+    for c in raw.encode("ascii", "ignore").translate(None, NON_COMMANDS).decode("ascii"):
+        # Brackets are never collapsed, each one opens or closes its own loop
+        if c == last and c not in "[]":
+            count += 1
+        else:
+            if last is not None:
+                ops.append((last, count))
+            last = c
+            count = 1
+
+    if last is not None:
+        ops.append((last, count))
+
+    return thread(ops)
+
+
+def thread(ops: list[tuple[str, int]]) -> list[tuple[Handler, int, int]]:
+    """Swap each command for its handler, resolving bracket targets and the
+    following ip inline, and end the program with a halting sentinel"""
+    threaded = [(HANDLERS[c], count, i + 1) for i, (c, count) in enumerate(ops)]
+    threaded.append((h_halt, 0, -1))
+    stack = []
+
+    for i, (c, _) in enumerate(ops):
+        if c == "[":
+            stack.append(i)
+        elif c == "]":
+            if not stack:
+                raise SyntaxError(f"Unmatched ] at position {i}")
+            open_idx = stack.pop()
+            # Either way the bracket on the other side would test the same
+            # cell and fall through, so continue just past it
+            threaded[open_idx] = (h_open, i + 1, open_idx + 1)
+            threaded[i] = (h_close, open_idx + 1, i + 1)
+
+    if stack:
+        raise SyntaxError(f"Unmatched [ at position {stack.pop()}")
+
+    return threaded
+
+
+def run(ops: list[tuple[Handler, int, int]], /, *, debug: bool = False) -> None:
+    """Interpret a Brainf*** program in *file*."""
+    state: list = [bytearray(TAPE_SIZE), 0]
+
+    # The sentinel at the end returns -1 rather than checking ip against len(ops)
+    ip: int = 0
+    while ip >= 0:
+        handler, arg, nxt = ops[ip]
+        next_ip = handler(arg, nxt, state)
+
+        if debug and handler is not h_halt:
+            tape, ptr = state
+            print(f"ip={ip}, cmd={COMMANDS[handler]}, ptr={ptr}, tape[{ptr}]={tape[ptr]}")
+        ip = next_ip
+
+    sys.stdout.flush()
+
+    if ZSH_FIXUP:
+        # Suppress `%` prompt artifact in zsh
+        print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Minimal Brainf**k interpreter with optional timing and debug output."
+    )
+    parser.add_argument("source", help="Path to Brainf**k source file")
+    parser.add_argument(
+        "-d", "--debug", action="store_true",
+        help="print interpreter state after every instruction"
+    )
+    parser.add_argument(
+        "-t", "--time", action="store_true",
+        help="time execution with the built-in timeit module"
+    )
+    parser.add_argument(
+        "-n", "--number", type=int, default=1000,
+        help="number of repetitions to run when --time is given (default: 1000)"
+    )
+    args = parser.parse_args()
+
+    # Load program
+    with open(args.source, "r", encoding="utf-8") as f:
+        program = parse_code(f.read())
+
+    # Run or benchmark
+    if args.time:
+        seconds = timeit.timeit(
+            lambda: run(program, debug=args.debug),
+            number=args.number
+        )
+        print(f"{seconds:.6f} s for {args.number} runs "
+              f"({seconds/args.number:.6f} s per run)")
+    else:
+        run(program, debug=args.debug)
+
+
+if __name__ == "__main__":
+    main()
+
+    """
+    $ uv run 06_threaded.py example.bf --time -n 10000
+    1.124231 s for 10000 runs (0.000112 s per run)
+    """